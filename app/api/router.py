@@ -1,21 +1,34 @@
 from fastapi import APIRouter, UploadFile, HTTPException, File, Query
-from typing import Optional, List
+from typing import Optional, List, Any, BinaryIO, Dict, Iterator, Tuple
+import os
 import uuid
-from io import BytesIO
-from app.types.query import QueryRequest, QueryResponse
+import shutil
+import tarfile
+import tempfile
+import zipfile
+from app.types.query import QueryRequest, QueryResponse, ChunkResult, StreamFormat
+from app.types.aggregate import AggregationRequest
 from app.core.document_ingestor import DocumentIngestor
-from app.utils.dependencies import weaviate_init, embedding_generator_init
+from app.utils.dependencies import weaviate_init, embedding_generator_init, embedding_pool_init, parse_pool_init
 from app.core.rag import RAGSystem
 from app.core.json_aggregator import JSONAggregator, AggregationOperationType
+from app.utils.streaming import stream_response
 
 router = APIRouter()
 
+# Read uploads in 1 MiB blocks when spooling them to disk
+UPLOAD_COPY_BUFFER_SIZE = 1024 * 1024
+
+ALLOWED_EXTENSIONS = ["pdf", "docx", "json", "txt"]
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
 
 @router.post('/upload')
-async def upload_file(file: UploadFile = File(...)):
+def upload_file(file: UploadFile = File(...)):
     """
     Upload a file to the knowledge base.
     Supports PDF, DOCX, JSON and TXT files.
+    Declared sync so FastAPI runs the blocking parsing in its threadpool.
     """
 
     try:
@@ -24,12 +37,11 @@ async def upload_file(file: UploadFile = File(...)):
         doc_id = str(uuid.uuid4())
 
         # Validate file extension
-        allowed_extensions = ["pdf", "docx", "json", "text"]
-        file_extension = file.filename.split(".")[-1]
+        file_extension = file.filename.split(".")[-1].lower()
 
-        if file_extension not in allowed_extensions:
+        if file_extension not in ALLOWED_EXTENSIONS:
             raise HTTPException(
-                status_code=400, detail=f"Unsupported file extension. Only {', '.join(allowed_extensions)} are allowed.")
+                status_code=400, detail=f"Unsupported file extension. Only {', '.join(ALLOWED_EXTENSIONS)} are allowed.")
 
         # Initialize the ingestor
         ingestor = DocumentIngestor(
@@ -37,13 +49,13 @@ async def upload_file(file: UploadFile = File(...)):
             embedding_generator=embedding_generator_init()
         )
 
-        content = await file.read()
-        file_obj = BytesIO(content)
-        file_obj.name = file.filename
+        # The upload is already spooled to disk by Starlette once it grows
+        # large, so parse it in place rather than copying it again
+        file.file.seek(0)
 
         # Process the file
         ingestor.process_document(
-            file=file_obj,
+            file=file.file,
             filename=file.filename,
             doc_id=doc_id
         )
@@ -62,6 +74,115 @@ async def upload_file(file: UploadFile = File(...)):
         )
 
 
+def _archive_members(path: str) -> Iterator[Tuple[str, BinaryIO]]:
+    """
+    Yield (filename, file object) for every regular file in a zip or tar archive
+    """
+
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    with archive.open(info) as member:
+                        yield os.path.basename(info.filename), member
+    else:
+        with tarfile.open(path) as archive:
+            for info in archive:
+                if info.isfile():
+                    with archive.extractfile(info) as member:
+                        yield os.path.basename(info.name), member
+
+
+@router.post('/upload/bulk')
+def upload_files(files: List[UploadFile] = File(...)):
+    """
+    Upload many files to the knowledge base in one request.
+    Accepts PDF, DOCX, JSON and TXT files as well as zip/tar archives of them.
+    Extraction runs in parallel and every file gets its own doc_id or error,
+    listed in upload order (archive members in place of their archive).
+    Declared sync so FastAPI runs the blocking ingestion in its threadpool.
+    """
+
+    try:
+        # Initialize the ingestor, embedding across the multi-process pool
+        ingestor = DocumentIngestor(
+            store_client=weaviate_init(),
+            embedding_generator=embedding_pool_init()
+        )
+
+        # One slot per input file; spooled files are filled in after processing
+        results = []
+        entries = []
+        entry_slots = []
+
+        with tempfile.TemporaryDirectory() as work_dir:
+
+            def spool(filename: str, source: BinaryIO):
+                file_extension = filename.split(".")[-1].lower()
+                if file_extension not in ALLOWED_EXTENSIONS:
+                    results.append({
+                        "filename": filename,
+                        "status": "failed",
+                        "error": f"Unsupported file extension. Only {', '.join(ALLOWED_EXTENSIONS)} are allowed."
+                    })
+                    return
+
+                # Name spooled files by position so archive member paths never touch the filesystem
+                path = os.path.join(work_dir, f"{len(entries)}.{file_extension}")
+                with open(path, "wb") as file_obj:
+                    shutil.copyfileobj(source, file_obj, UPLOAD_COPY_BUFFER_SIZE)
+                entries.append((path, filename, str(uuid.uuid4())))
+                entry_slots.append(len(results))
+                results.append(None)
+
+            for file in files:
+                file.file.seek(0)
+                if not file.filename.lower().endswith(ARCHIVE_SUFFIXES):
+                    spool(file.filename, file.file)
+                    continue
+
+                archive_path = os.path.join(work_dir, f"archive-{uuid.uuid4()}")
+                with open(archive_path, "wb") as archive_obj:
+                    shutil.copyfileobj(file.file, archive_obj, UPLOAD_COPY_BUFFER_SIZE)
+
+                try:
+                    for filename, member in _archive_members(archive_path):
+                        spool(filename, member)
+                except Exception as e:
+                    # Truncated, encrypted or unsupported archives fail only this
+                    # upload; members spooled before the error are still processed
+                    results.append({
+                        "filename": file.filename,
+                        "status": "failed",
+                        "error": f"Invalid archive: {str(e)}"
+                    })
+                finally:
+                    os.remove(archive_path)
+
+            if entries:
+                processed = ingestor.process_documents(
+                    entries, parse_pool=parse_pool_init())
+                for slot, result in zip(entry_slots, processed):
+                    results[slot] = result
+
+        return {
+            "processed": sum(1 for result in results if result["status"] == "processed"),
+            "failed": sum(1 for result in results if result["status"] == "failed"),
+            "results": results
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error processing documents: {str(e)}"
+        )
+
+
+def _query_rows(query: str, hits: Iterator[Dict[str, Any]]) -> Iterator[Any]:
+    yield {"query": query}
+    for hit in hits:
+        yield ChunkResult(**hit)
+
+
 @router.post("/query", response_model=QueryResponse)
 async def query_documents(request: QueryRequest):
     """
@@ -75,10 +196,21 @@ async def query_documents(request: QueryRequest):
             embedding_generator=embedding_generator_init()
         )
 
-        # Query the database
+        # Query the database, pushing filters down into the vector search
+        filters = request.filters.model_dump() if request.filters else {}
+
+        if request.stream:
+            hits = rag_system.query_stream(
+                query=request.query,
+                top_k=request.limit if request.limit else 5,
+                **filters
+            )
+            return stream_response(_query_rows(request.query, hits), request.stream)
+
         results = rag_system.query(
             query=request.query,
-            top_k=request.limit if request.limit else 5
+            top_k=request.limit if request.limit else 5,
+            **filters
         )
 
         return QueryResponse(query=request.query, results=results)
@@ -98,6 +230,7 @@ async def aggregate_json_field(
     min_occurrences: Optional[str] = "1",
     distance: Optional[float] = Query(None, ge=0.0, le=1.0),
     query_text: Optional[str] = None,
+    stream: Optional[StreamFormat] = None,
 ):
     """ 
     Perform aggregation operations on json fields
@@ -107,6 +240,18 @@ async def aggregate_json_field(
         # Initialize JSONAggregator
         processor = JSONAggregator(
             weaviate_init(), embedding_generator=embedding_generator_init())
+
+        if stream:
+            rows = processor.aggregate_stream(
+                field_path=field_path,
+                operation=operation,
+                doc_id=doc_id,
+                min_occurrences=int(min_occurrences),
+                distance=distance,
+                query_text=query_text
+            )
+            return stream_response(rows, stream)
+
         result = processor.aggregate(
             field_path=field_path,
             operation=operation,
@@ -122,3 +267,42 @@ async def aggregate_json_field(
             status_code=500,
             detail=f"Error aggregating JSON field: {str(e)}"
         )
+
+
+@router.post("/aggregate")
+async def aggregate_json_fields(request: AggregationRequest):
+    """
+    Perform several aggregation operations on json fields in a single scan,
+    optionally grouped by another json field
+    """
+
+    try:
+        # Initialize JSONAggregator
+        processor = JSONAggregator(
+            weaviate_init(), embedding_generator=embedding_generator_init())
+        result = processor.aggregate_many(
+            metrics=[(metric.field_path, metric.operation) for metric in request.metrics],
+            group_by=request.group_by,
+            doc_id=request.doc_id,
+            min_occurrences=request.min_occurrences,
+            distance=request.distance,
+            query_text=request.query_text
+        )
+
+        if request.stream:
+            header = {"group_by": result["group_by"], "columns": result["columns"]}
+            return stream_response([header, *result["rows"]], request.stream)
+
+        return result
+
+    except ValueError as e:
+        # Metric fields that don't sit under the group_by record path
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid aggregation request: {str(e)}"
+        )
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error aggregating JSON fields: {str(e)}"
+        )
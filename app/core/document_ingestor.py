@@ -1,6 +1,10 @@
 
-from typing import BinaryIO, Dict, Any
-from datetime import datetime
+from typing import BinaryIO, Dict, Any, Iterator, List, Tuple
+from datetime import datetime, timezone
+from concurrent.futures import Executor, as_completed
+import os
+import shutil
+import tempfile
 import pdfplumber
 from pdfminer.high_level import extract_text
 import json
@@ -8,6 +12,15 @@ from docx import Document
 from PIL import Image
 import pytesseract
 import pdf2image
+from weaviate.classes.data import DataObject
+from weaviate.classes.query import Filter
+
+# Read file objects in 1 MiB blocks when spooling them to disk for OCR
+OCR_COPY_BUFFER_SIZE = 1024 * 1024
+
+# Number of chunks embedded and written to the database per batch. Large
+# enough to give every process of an EmbeddingPool several shards.
+STORE_BATCH_SIZE = 2048
 
 
 class DocumentIngestor:
@@ -21,217 +34,318 @@ class DocumentIngestor:
         """
 
         file_type = filename.split('.')[-1].lower()
-        metadata = self._extract_metadata(file, file_type)
-        content = self._extract_content(file, file_type)
-        if file_type == 'json':
-            # For JSON files, parse and store as JSON string
-            try:
-                if isinstance(content, str):
-                    json_content = json.loads(content)
-                else:
-                    json_content = content
-
-                # Convert JSON to string for storage
-                json_str = json.dumps(json_content)
-
-                # Generate embedding for the JSON content
-                embedding = self.embedding_generator.generate(json_str)
-
-                # Store the JSON data as string
-                document = self.store_client.collections.get("Document")
-                document.data.insert(
-                    properties={
-                        "content": json_str,
-                        "json": json_str,  # Store as JSON string
-                        "metadata": json.dumps({
-                            "filename": filename,
-                            "total_records": len(json_content) if isinstance(json_content, list) else 1,
-                            **metadata
-                        }),
-                        "doc_id": doc_id,
-                        "chunk_id": 0,
-                        "file_type": file_type,
-                    },
-                    vector=embedding
-                )
-            except Exception as e:
-                raise e
-        else:
-            # For non-JSON files, use the original chunking logic
-            # Chunkify the content
-            chunks = self._chunkify_content(content)
-
-            # Generate embeddings for each chunk
-            for idx, chunk in enumerate(chunks):
-                embedding = self.embedding_generator.generate(chunk)
-                document = self.store_client.collections.get("Document")
-
-                document.data.insert(
-                    properties={
-                        "content": chunk,
-                        "json": None,  # No JSON for non-JSON files
-                        "metadata": json.dumps({
-                            "filename": filename,
-                            "total_chunks": len(chunks),
-                            **metadata
-                        }),
-                        "doc_id": doc_id,
-                        "chunk_id": idx,
-                        "file_type": file_type,
-                    },
-                    vector=embedding
-                )
-
-    def _extract_metadata(self, file: BinaryIO, file_type: str) -> Dict[str, Any]:
-        """
-        Extract metadata from the document
+        metadata, content = self._parse_document(file, file_type)
+        objects = self._build_objects(metadata, content, filename, doc_id, file_type)
+        if not objects:
+            return
+
+        errors = self._store_objects(objects)
+        if errors:
+            # Don't leave a partially stored document behind
+            self._delete_document(doc_id)
+            raise Exception(f"Failed to store document: {next(iter(errors.values()))}")
+
+    def process_documents(
+            self,
+            files: List[Tuple[str, str, str]],
+            parse_pool: Executor,
+            batch_size: int = STORE_BATCH_SIZE
+    ) -> List[Dict[str, Any]]:
         """
+        Process many documents at once.
 
-        metadata = {
-            "file_type": file_type,
-            "timestamp": datetime.now().isoformat(),
-            "extraction_method": "unknown"
+        `files` is a list of (path, filename, doc_id) tuples. Parsing is fanned out
+        across `parse_pool` while the parsed chunks are embedded and written to
+        the database in shared batches. Returns one result per file, in input order.
+        """
+
+        results = {
+            doc_id: {"doc_id": doc_id, "filename": filename, "status": "processed"}
+            for _, filename, doc_id in files
         }
+        pending = []
 
-        try:
-            match file_type:
-                case "pdf":
-                    pos = file.tell()
-                    file.seek(0)
+        futures = {
+            parse_pool.submit(_parse_file, path, filename): (filename, doc_id)
+            for path, filename, doc_id in files
+        }
 
-                    try:
-                        with pdfplumber.open(file) as pdf:
-                            pdf_meta = pdf.metadata or {}
-                            metadata.update({
-                                "title": pdf_meta.get("Title", "Untitled"),
-                                "author": pdf_meta.get("Author", "Unknown"),
-                                "page_count": len(pdf.pages),
-                                "creation_date": pdf_meta.get("CreationDate", "Unknown"),
-                                "modified_date": pdf_meta.get("ModDate", "Unknown"),
-                            })
-                    except Exception as e:
-                        print(f"Error reading PDF metadata: {e}")
-                        metadata.update({
-                            "title": "Unknown",
-                            "author": "Unknown",
-                            "page_count": 0,
-                            "error": str(e)
-                        })
+        for future in as_completed(futures):
+            filename, doc_id = futures[future]
+            try:
+                metadata, content = future.result()
+                file_type = filename.split('.')[-1].lower()
+                pending.extend(self._build_objects(
+                    metadata, content, filename, doc_id, file_type))
+            except Exception as e:
+                results[doc_id].update({"status": "failed", "error": str(e)})
+                continue
 
-                    # Add extraction method to metadata
-                    metadata["extraction_method"] = self.last_extraction_method or "unknown"
-                    if self.last_extraction_method == "OCR":
-                        metadata["ocr_processed"] = True
+            if len(pending) >= batch_size:
+                self._flush_batch(pending, results)
+                pending = []
 
-                    file.seek(pos)
+        if pending:
+            self._flush_batch(pending, results)
 
-                case "docx":
-                    pos = file.tell()
-                    file.seek(0)
+        return list(results.values())
 
-                    doc = Document(file)
-                    meta = doc.core_properties
-                    metadata.update({
-                        "file_type": file_type,
-                        "title": meta.title,
-                        "author": meta.author,
-                        "creation_date": meta.created.isoformat() if meta.created else None,
-                        "last_modified_by": meta.last_modified_by,
-                    })
+    def _flush_batch(self, objects: List[Dict[str, Any]], results: Dict[str, Dict[str, Any]]):
+        """
+        Embed and store a batch of objects, recording failures against their documents
+        and removing whatever was stored for a failed document
+        """
 
-                    file.seek(pos)
+        failed = {}
+        for idx, error in self._store_objects(objects).items():
+            failed.setdefault(objects[idx]["doc_id"], error)
 
-                case "json":
-                    content = file.read()
-                    file.seek(0)
+        for doc_id, error in failed.items():
+            self._delete_document(doc_id)
+            results[doc_id].update({"status": "failed", "error": error})
 
-                    json_data = json.loads(content)
-                    metadata.update({
-                        "keys_count": len(json_data) if isinstance(json_data, dict) else len(json_data) if isinstance(json_data, list) else 0,
-                        "data_type": type(json_data).__name__
-                    })
+    def _store_objects(self, objects: List[Dict[str, Any]]) -> Dict[int, str]:
+        """
+        Generate embeddings for the objects' content and insert them in slices of
+        STORE_BATCH_SIZE. Returns error messages keyed by index into objects.
+        """
 
-                case "txt":
-                    content = file.read().decode('utf-8')
-                    file.seek(0)  # Reset file pointer
-                    lines = content.split('\n')
-                    metadata.update({
-                        "line_count": len(lines),
-                        "character_count": len(content),
-                        "word_count": len(content.split())
-                    })
+        document = self.store_client.collections.get("Document")
+        errors = {}
+
+        for start in range(0, len(objects), STORE_BATCH_SIZE):
+            batch = objects[start:start + STORE_BATCH_SIZE]
+            try:
+                embeddings = self.embedding_generator.generate_batch(
+                    [obj["content"] for obj in batch])
+
+                response = document.data.insert_many([
+                    DataObject(properties=properties, vector=embedding)
+                    for properties, embedding in zip(batch, embeddings)
+                ])
+            except Exception as e:
+                errors.update({start + idx: str(e) for idx in range(len(batch))})
+                continue
+
+            for idx, error in response.errors.items():
+                errors[start + idx] = error.message
+
+        return errors
+
+    def _delete_document(self, doc_id: str):
+        """
+        Delete every stored chunk of a document
+        """
+
+        try:
+            document = self.store_client.collections.get("Document")
+            document.data.delete_many(
+                where=Filter.by_property("doc_id").equal(doc_id))
         except Exception as e:
-            print(f"Error extracting metadata: {e}")
+            print(f"Error deleting document {doc_id}: {e}")
+
+    def _build_objects(self, metadata: Dict[str, Any], content: Any, filename: str, doc_id: str, file_type: str) -> List[Dict[str, Any]]:
+        """
+        Build the collection properties for every chunk of a parsed document
+        """
 
-        return {k: v for k, v in metadata.items() if v is not None}
+        if file_type == 'json':
+            # For JSON files, parse and store as JSON string
+            if isinstance(content, str):
+                json_content = json.loads(content)
+            else:
+                json_content = content
+
+            # Convert JSON to string for storage
+            json_str = json.dumps(json_content)
+
+            return [{
+                "content": json_str,
+                "json": json_str,  # Store as JSON string
+                "metadata": json.dumps({
+                    "filename": filename,
+                    "total_records": len(json_content) if isinstance(json_content, list) else 1,
+                    **metadata
+                }),
+                "doc_id": doc_id,
+                "chunk_id": 0,
+                "file_type": file_type,
+                **self._structured_properties(filename, metadata, total_chunks=1),
+            }]
+
+        # For non-JSON files, use the original chunking logic
+        chunks = self._chunkify_content(content)
+
+        return [
+            {
+                "content": chunk,
+                "json": None,  # No JSON for non-JSON files
+                "metadata": json.dumps({
+                    "filename": filename,
+                    "total_chunks": len(chunks),
+                    **metadata
+                }),
+                "doc_id": doc_id,
+                "chunk_id": idx,
+                "file_type": file_type,
+                **self._structured_properties(filename, metadata, total_chunks=len(chunks)),
+            }
+            for idx, chunk in enumerate(chunks)
+        ]
+
+    def _structured_properties(self, filename: str, metadata: Dict[str, Any], total_chunks: int) -> Dict[str, Any]:
+        """
+        Map extracted metadata onto the typed, filterable collection properties
+        """
+
+        page_count = metadata.get("page_count")
 
-    def _extract_content(self, file: BinaryIO, file_type: str) -> str:
+        return {
+            "filename": filename,
+            "title": str(metadata["title"]) if metadata.get("title") else None,
+            "author": str(metadata["author"]) if metadata.get("author") else None,
+            "page_count": page_count if isinstance(page_count, int) else None,
+            "total_chunks": total_chunks,
+            "timestamp": metadata.get("timestamp"),
+            "extraction_method": metadata.get("extraction_method"),
+        }
+
+    def _parse_document(self, file: BinaryIO, file_type: str) -> Tuple[Dict[str, Any], Any]:
         """
-        Extract content from the document
+        Parse the document in a single pass, returning its metadata and content
         """
 
+        metadata = {
+            "file_type": file_type,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "extraction_method": "unknown"
+        }
+
+        file.seek(0)
+
         match file_type:
             case "pdf":
-                self.last_extraction_method = None  # Reset for each extraction
                 text_content = ""
+                page_count = 0
 
-                # Validate PDF first
                 try:
-                    # Try to read as PDF first
-                    file.seek(0)
                     with pdfplumber.open(file) as pdf:
+                        pdf_meta = pdf.metadata or {}
+                        page_count = len(pdf.pages)
+                        metadata.update({
+                            "title": pdf_meta.get("Title", "Untitled"),
+                            "author": pdf_meta.get("Author", "Unknown"),
+                            "page_count": page_count,
+                            "creation_date": pdf_meta.get("CreationDate", "Unknown"),
+                            "modified_date": pdf_meta.get("ModDate", "Unknown"),
+                        })
                         text_content = "\n".join(
                             page.extract_text() or "" for page in pdf.pages)
                 except Exception as e:
                     print(f"PDF text extraction failed: {e}")
-                    text_content = ""
+                    metadata.update({
+                        "title": "Unknown",
+                        "author": "Unknown",
+                        "page_count": 0,
+                        "error": str(e)
+                    })
 
                 # If no text is found or text is very short, try OCR
                 if not text_content or len(text_content.strip()) < 50:
                     try:
-                        file.seek(0)
-                        images = pdf2image.convert_from_bytes(
-                            file.read(),
-                            fmt='jpeg',
-                            dpi=300
-                        )
-
-                        text_contents = []
-                        for image in images:
-                            text = pytesseract.image_to_string(image)
-                            if text.strip():  # Only add non-empty text
-                                text_contents.append(text)
+                        text_contents = [
+                            text for text in self._ocr_pages(file, page_count)
+                            if text.strip()  # Only add non-empty text
+                        ]
 
                         if text_contents:
                             text_content = "\n".join(text_contents)
-                            self.last_extraction_method = "OCR"
+                            metadata["extraction_method"] = "OCR"
+                            metadata["ocr_processed"] = True
                         else:
-                            self.last_extraction_method = "FAILED"
+                            metadata["extraction_method"] = "FAILED"
                             text_content = "No text could be extracted from this document."
 
                     except Exception as e:
                         print(f"OCR extraction failed: {e}")
-                        self.last_extraction_method = "FAILED"
+                        metadata["extraction_method"] = "FAILED"
                         text_content = "Failed to process document."
                 else:
-                    self.last_extraction_method = "text_only"
+                    metadata["extraction_method"] = "text_only"
 
-                file.seek(0)  # Reset file pointer
-                return text_content
+                content = text_content
 
             case "docx":
                 doc = Document(file)
-                return "\n".join([paragraph.text for paragraph in doc.paragraphs])
+                meta = doc.core_properties
+                metadata.update({
+                    "title": meta.title,
+                    "author": meta.author,
+                    "creation_date": meta.created.isoformat() if meta.created else None,
+                    "last_modified_by": meta.last_modified_by,
+                    "extraction_method": "text_only",
+                })
+                content = "\n".join([paragraph.text for paragraph in doc.paragraphs])
 
             case "json":
-                return json.dumps(json.load(file), indent=2)
+                content = json.load(file)
+                metadata.update({
+                    "keys_count": len(content) if isinstance(content, (dict, list)) else 0,
+                    "data_type": type(content).__name__,
+                    "extraction_method": "text_only",
+                })
 
             case "txt":
-                return file.read().decode('utf-8')
+                content = file.read().decode('utf-8')
+                metadata.update({
+                    "line_count": content.count('\n') + 1,
+                    "character_count": len(content),
+                    "word_count": len(content.split()),
+                    "extraction_method": "text_only",
+                })
 
             case _:
                 raise ValueError(f"Unsupported file type: {file_type}")
 
+        file.seek(0)  # Reset file pointer
+
+        return {k: v for k, v in metadata.items() if v is not None}, content
+
+    def _ocr_pages(self, file: BinaryIO, page_count: int) -> Iterator[str]:
+        """
+        OCR the PDF one page at a time so only a single rendered page is held in memory
+        """
+
+        path = getattr(file, "name", None)
+        if isinstance(path, str) and os.path.isfile(path):
+            yield from self._ocr_pages_from_path(path, page_count)
+            return
+
+        # pdf2image renders from a path, so spool file objects without one to disk
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as spooled:
+            file.seek(0)
+            shutil.copyfileobj(file, spooled, OCR_COPY_BUFFER_SIZE)
+            spooled.flush()
+            yield from self._ocr_pages_from_path(spooled.name, page_count)
+
+    def _ocr_pages_from_path(self, path: str, page_count: int) -> Iterator[str]:
+        if not page_count:
+            # Page count unknown (pdfplumber could not open the file), render everything
+            for image in pdf2image.convert_from_path(path, fmt='jpeg', dpi=300):
+                yield pytesseract.image_to_string(image)
+            return
+
+        for page_number in range(1, page_count + 1):
+            images = pdf2image.convert_from_path(
+                path,
+                fmt='jpeg',
+                dpi=300,
+                first_page=page_number,
+                last_page=page_number
+            )
+            for image in images:
+                yield pytesseract.image_to_string(image)
+
     def _chunkify_content(self, content: str, chunk_size: int = 1000) -> list[str]:
         """
         Chunkify the content into smaller chunks
@@ -242,3 +356,12 @@ class DocumentIngestor:
             chunks.append(content[i:i+chunk_size])
 
         return chunks
+
+
+def _parse_file(path: str, filename: str) -> Tuple[Dict[str, Any], Any]:
+    """
+    Parse a document from disk. Module-level so it can run in a worker process.
+    """
+
+    with open(path, 'rb') as file:
+        return DocumentIngestor(None, None)._parse_document(file, filename.split('.')[-1].lower())
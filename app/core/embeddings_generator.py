@@ -1,3 +1,8 @@
+import multiprocessing
+import os
+import queue
+import threading
+from typing import Optional
 from sentence_transformers import SentenceTransformer
 
 
@@ -10,3 +15,190 @@ class EmbeddingGenerator:
         embedding = self.model.encode(text, convert_to_tensor=False)
 
         return embedding.tolist()
+
+    def generate_batch(self, texts: list[str], batch_size: int = 32) -> list[list[float]]:
+        embeddings = self.model.encode(
+            texts, batch_size=batch_size, convert_to_tensor=False)
+
+        return embeddings.tolist()
+
+
+# How often a blocked pool call wakes up to check its workers are alive
+POLL_INTERVAL = 1.0
+
+
+def _embedding_worker(input_queue, output_queue, threads: int, batch_size: int):
+    """
+    Worker process loop: embed sharded batches with a single EmbeddingGenerator
+    """
+
+    try:
+        import torch
+
+        # Small MiniLM batches scale poorly with intra-op threads, so each
+        # process gets only a few and parallelism comes from the process count
+        torch.set_num_threads(threads)
+        generator = EmbeddingGenerator()
+    except Exception as e:
+        output_queue.put((None, None, f"Failed to load embedding model: {e}"))
+        return
+
+    while True:
+        item = input_queue.get()
+        if item is None:
+            break
+
+        idx, texts = item
+        try:
+            output_queue.put((idx, generator.generate_batch(texts, batch_size=batch_size), None))
+        except Exception as e:
+            output_queue.put((idx, None, str(e)))
+
+
+class EmbeddingPool:
+    """
+    Multi-process embedding pool for large ingestion jobs.
+
+    Shards batches of texts across worker processes, each running its own
+    EmbeddingGenerator with a fixed number of torch threads. At most
+    `queue_size` shards are in flight at once, so memory stays bounded no
+    matter how many texts are submitted. Exposes the same generate /
+    generate_batch interface as EmbeddingGenerator.
+
+    If a worker reports an error, dies, or a shard takes longer than
+    `timeout` seconds, the call fails and the pool is torn down; the next
+    call starts a fresh set of workers.
+    """
+
+    def __init__(
+            self,
+            processes: Optional[int] = None,
+            threads_per_process: int = 1,
+            shard_size: int = 32,
+            queue_size: Optional[int] = None,
+            timeout: float = 600.0
+    ):
+        if threads_per_process < 1:
+            raise ValueError("threads_per_process must be at least 1")
+
+        self.threads_per_process = threads_per_process
+        self.processes = processes or max(1, (os.cpu_count() or 1) // threads_per_process)
+        self.shard_size = shard_size
+        self.queue_size = queue_size or self.processes * 2
+        self.timeout = timeout
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self._workers:
+            return
+
+        context = multiprocessing.get_context("spawn")
+        self._input_queue = context.Queue(maxsize=self.queue_size)
+        self._output_queue = context.Queue()
+
+        for _ in range(self.processes):
+            worker = context.Process(
+                target=_embedding_worker,
+                args=(self._input_queue, self._output_queue,
+                      self.threads_per_process, self.shard_size),
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self):
+        if not self._workers:
+            return
+
+        for _ in self._workers:
+            try:
+                self._input_queue.put(None, timeout=POLL_INTERVAL)
+            except queue.Full:
+                break
+        for worker in self._workers:
+            worker.join(timeout=POLL_INTERVAL * 5)
+
+        self._terminate()
+
+    def _terminate(self):
+        """Kill any remaining workers and discard the queues"""
+        for worker in self._workers:
+            if worker.is_alive():
+                worker.terminate()
+            worker.join()
+
+        self._workers = []
+        for q in (self._input_queue, self._output_queue):
+            q.cancel_join_thread()
+            q.close()
+
+    def _check_workers(self):
+        dead = [worker for worker in self._workers if not worker.is_alive()]
+        if dead:
+            raise RuntimeError(
+                f"Embedding worker exited unexpectedly (exit code {dead[0].exitcode})")
+
+    def _put(self, item):
+        while True:
+            try:
+                self._input_queue.put(item, timeout=POLL_INTERVAL)
+                return
+            except queue.Full:
+                self._check_workers()
+
+    def _get(self):
+        waited = 0.0
+        while True:
+            try:
+                return self._output_queue.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                self._check_workers()
+                waited += POLL_INTERVAL
+                if waited >= self.timeout:
+                    raise RuntimeError(
+                        f"Timed out after {self.timeout}s waiting for embeddings")
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def generate(self, text: str) -> list[float]:
+        return self.generate_batch([text])[0]
+
+    def generate_batch(self, texts: list[str], batch_size: Optional[int] = None) -> list[list[float]]:
+        """
+        Embed texts across the worker processes, preserving input order.
+        batch_size overrides the shard size for this call.
+        """
+
+        shard_size = batch_size or self.shard_size
+        shards = [texts[i:i + shard_size] for i in range(0, len(texts), shard_size)]
+        results = [None] * len(shards)
+
+        # One caller at a time so results from concurrent calls never mix
+        with self._lock:
+            self.start()
+
+            try:
+                submitted = completed = 0
+                while completed < len(shards):
+                    # Keep at most queue_size shards in flight
+                    while submitted < len(shards) and submitted - completed < self.queue_size:
+                        self._put((submitted, shards[submitted]))
+                        submitted += 1
+
+                    idx, embeddings, error = self._get()
+                    if error:
+                        raise RuntimeError(f"Embedding worker failed: {error}")
+                    results[idx] = embeddings
+                    completed += 1
+            except BaseException:
+                # Outstanding shards would leak into the next call, so start over
+                self._terminate()
+                raise
+
+        return [embedding for shard in results for embedding in shard]
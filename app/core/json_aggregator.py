@@ -1,4 +1,4 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Callable, Optional, List, Iterator, Tuple
 from enum import Enum
 import json
 from weaviate.classes.query import Filter
@@ -6,6 +6,10 @@ from collections import Counter
 from statistics import mean, median
 
 
+# Objects fetched per request when paging through query results
+FETCH_PAGE_SIZE = 100
+
+
 class AggregationOperationType(Enum):
     COUNT = "count"
     SUM = "sum"
@@ -36,25 +40,27 @@ class JSONAggregator:
         """
        
         try:
-            # Parse JSON string
-            if isinstance(obj.get('json'), str):
-                json_data = json.loads(obj.get('json'))
-            else:
-                json_data = obj.get('json')
-
-            # Clean up field_path
-            sub_paths = path.split('.')
-
-            # discard 'json' prefix
-            if sub_paths[0] == 'json':
-                sub_paths = sub_paths[1:]
-
             # Traverse the JSON object
-            return self._extract_values(json_data, sub_paths)
+            return self._extract_values(self._parse_json(obj), self._split_path(path))
         except Exception as e:
             print(f"Error extracting values: {e}")
             return []
 
+    def _parse_json(self, obj: Dict) -> Any:
+        """Parse the JSON string stored on an object"""
+        if isinstance(obj.get('json'), str):
+            return json.loads(obj.get('json'))
+        return obj.get('json')
+
+    def _split_path(self, path: str) -> List[str]:
+        """Split a field path into segments, discarding the 'json' prefix"""
+        sub_paths = path.split('.')
+
+        if sub_paths[0] == 'json':
+            sub_paths = sub_paths[1:]
+
+        return sub_paths
+
     def _extract_values(self,data_obj_context: Any, paths: List[str]) -> List[Any]:
         if not paths:
             return [data_obj_context] if data_obj_context is not None else []
@@ -108,15 +114,8 @@ class JSONAggregator:
             return len(processed_values)
 
         elif operation == AggregationOperationType.TEXT_OCCURRENCES:
-            # Ensure all values are strings for counting
-            str_values = [str(v) for v in processed_values]
-            counter = Counter(str_values)
-            occurrences = [
-                {"value": value, "count": count}
-                for value, count in counter.items()
-                if count >= min_occurrences
-            ]
-            return sorted(occurrences, key=lambda x: (-x["count"], x["value"]))
+            return list(self._iter_occurrences(
+                Counter(str(v) for v in processed_values), min_occurrences))
 
         # Numeric operations
         try:
@@ -141,6 +140,101 @@ class JSONAggregator:
             return None
 
 
+    def _fetch_objects(
+            self,
+            doc_id: Optional[str] = None,
+            distance: Optional[float] = None,
+            query_text: Optional[str] = None
+    ) -> Iterator[Any]:
+        """
+        Yield the objects to aggregate over, one page at a time, so memory stays
+        bounded by the page size rather than the number of matching objects
+        """
+
+        # Build the query
+        query=self.collection.query
+
+        # Filter if doc_id is provided
+        filters=None
+        if doc_id:
+            filters=Filter.by_property("doc_id").equal(doc_id)
+
+        # Add vector search if query_text is provided
+        if query_text and self.embedding_generator:
+            query_vector=self.embedding_generator.generate(query_text)
+
+            if distance:
+                yield from self._paginate(lambda limit, offset: query.near_vector(
+                    near_vector=query_vector,
+                    distance=distance,
+                    filters=filters,
+                    limit=limit,
+                    offset=offset,
+                    return_properties=["json"]
+                ))
+            else:
+                # Use hybrid search if no distance specified
+                yield from self._paginate(lambda limit, offset: query.hybrid(
+                    query=query_text,
+                    vector=query_vector,
+                    alpha=0.5,
+                    filters=filters,
+                    limit=limit,
+                    offset=offset,
+                    return_properties=["json"]
+                ))
+
+        else:
+            # Use basic query with filters
+            if filters:
+                # The cursor API does not take filters, so page with limit/offset
+                yield from self._paginate(lambda limit, offset: query.fetch_objects(
+                    filters=filters,
+                    limit=limit,
+                    offset=offset,
+                    return_properties=["json"]
+                ))
+            else:
+                # Full scan with the cursor API, which has no result cap
+                yield from self.collection.iterator(return_properties=["json"])
+
+    def _paginate(self, run_query: Callable[[int, int], Any]) -> Iterator[Any]:
+        """Yield objects from run_query(limit, offset) until a short page is returned"""
+        offset = 0
+        while True:
+            objects = run_query(FETCH_PAGE_SIZE, offset).objects
+            yield from objects
+            if len(objects) < FETCH_PAGE_SIZE:
+                return
+            offset += FETCH_PAGE_SIZE
+
+    def _fetch_values(
+            self,
+            field_path: str,
+            doc_id: Optional[str] = None,
+            distance: Optional[float] = None,
+            query_text: Optional[str] = None
+    ) -> List[Any]:
+        """
+        Fetch the matching objects and extract every value at field_path
+        """
+
+        return list(self._iter_values(field_path, doc_id, distance, query_text))
+
+    def _iter_values(
+            self,
+            field_path: str,
+            doc_id: Optional[str] = None,
+            distance: Optional[float] = None,
+            query_text: Optional[str] = None
+    ) -> Iterator[Any]:
+        """
+        Yield the values at field_path one fetched object at a time
+        """
+
+        for obj in self._fetch_objects(doc_id, distance, query_text):
+            yield from self._get_nested_value(obj.properties, field_path)
+
     def aggregate(
             self,field_path:str,
             operation: AggregationOperationType,
@@ -154,62 +248,156 @@ class JSONAggregator:
         Perform custom aggregation on JSON fields
         """
         try:
-            # Build the query
-            query=self.collection.query
-
-            # Filter if doc_id is provided
-            filters=None
-            if doc_id:
-                filters=Filter.by_property("doc_id").equal(doc_id)
-
-            # Add vector search if query_text is provided
-            if query_text and self.embedding_generator:
-                query_vector=self.embedding_generator.generate(query_text)
-
-                if distance:
-                    response=query.near_vector(
-                        near_vector=query_vector,
-                        distance=distance,
-                        filters=filters
-                    ).do()
-                else:
-                    # Use hybrid search if no distance specified
-                    response=query.hybrid(
-                        query=query_text,
-                        vector=query_vector,
-                        alpha=0.5,
-                        filters=filters
-                    ).do()
-            
+            all_values = self._fetch_values(field_path, doc_id, distance, query_text)
+
+            # Perform aggregation
+            result = self._aggregate_values(
+                all_values, operation, min_occurrences)
+
+            # Format response
+            response_data = {
+                "field": field_path,
+                "operation": operation.value,
+            }
+
+            if operation == AggregationOperationType.TEXT_OCCURRENCES:
+                response_data["occurrences"] = result
             else:
-                # Use basic query with filters
-                if filters:
-                    response = query.fetch_objects(filters=filters)
-                else:
-                    response = query.fetch_objects()
-
-                # Extract and aggregate values
-                all_values = []
-                for obj in response.objects:
-                    values = self._get_nested_value(obj.properties, field_path)
-                    all_values.extend(values)
-                # Perform aggregation
-                result = self._aggregate_values(
-                    all_values, operation, min_occurrences)
-
-                # Format response
-                response_data = {
-                    "field": field_path,
-                    "operation": operation.value,
-                }
-                
-
-                if operation == AggregationOperationType.TEXT_OCCURRENCES:
-                    response_data["occurrences"] = result
-                else:
-                    response_data["value"] = result
-
-                return response_data
+                response_data["value"] = result
+
+            return response_data
         except Exception as e:
             print(f"Aggregation error: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    def aggregate_stream(
+            self,field_path:str,
+            operation: AggregationOperationType,
+            doc_id:str=None,
+            min_occurrences:int=1,
+            distance:Optional[float]=None,
+            query_text:Optional[str]=None
+    )->Iterator[Dict[str,Any]]:
+        """
+        Perform custom aggregation on JSON fields, returning the result as rows.
+
+        The first row describes the aggregation; TEXT_OCCURRENCES then yields one row
+        per distinct value, other operations yield a single value row. The aggregation
+        is computed before returning so query errors surface before streaming starts.
+        Occurrences are counted while scanning, without keeping the raw values.
+        """
+        try:
+            if operation == AggregationOperationType.TEXT_OCCURRENCES:
+                # Convert any dictionary values to strings for counting
+                counter = Counter(
+                    str(v) for v in self._iter_values(field_path, doc_id, distance, query_text))
+                rows = self._iter_occurrences(counter, min_occurrences)
+            else:
+                all_values = self._fetch_values(field_path, doc_id, distance, query_text)
+                rows = iter([{"value": self._aggregate_values(all_values, operation, min_occurrences)}])
+        except Exception as e:
+            print(f"Aggregation error: {str(e)}")
+            raise
+
+        return self._aggregate_rows(field_path, operation, rows)
+
+    def _aggregate_rows(self, field_path: str, operation: AggregationOperationType, rows: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        yield {"field": field_path, "operation": operation.value}
+        yield from rows
+
+    def _iter_occurrences(self, counter: Counter, min_occurrences: int = 1) -> Iterator[Dict[str, Any]]:
+        """Yield occurrence rows ordered by descending count, then value"""
+        counts = sorted(
+            ((value, count) for value, count in counter.items() if count >= min_occurrences),
+            key=lambda x: (-x[1], x[0])
+        )
+
+        for value, count in counts:
+            yield {"value": value, "count": count}
+
+    def aggregate_many(
+            self,
+            metrics: List[Tuple[str, AggregationOperationType]],
+            group_by: Optional[str] = None,
+            doc_id: Optional[str] = None,
+            min_occurrences: int = 1,
+            distance: Optional[float] = None,
+            query_text: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Compute several (field_path, operation) aggregations in one scan, optionally grouped.
+
+        Grouping works per record: the record is the parent of the group_by field
+        (e.g. each element of 'json.orders[]' for 'json.orders[].status') and every
+        metric field must live under that same record path.
+        """
+        try:
+            columns = [f"{operation.value}({field_path})" for field_path, operation in metrics]
+
+            if group_by:
+                group_paths = self._split_path(group_by)
+                record_paths, key_paths = group_paths[:-1], group_paths[-1:]
+            else:
+                record_paths, key_paths = [], None
+
+            metric_paths = []
+            for field_path, _ in metrics:
+                paths = self._split_path(field_path)
+                if paths[:len(record_paths)] != record_paths:
+                    raise ValueError(
+                        f"Field '{field_path}' is not under the group_by record path '{group_by}'")
+                metric_paths.append(paths[len(record_paths):])
+
+            # group key -> one list of values per metric
+            groups: Dict[Any, List[List[Any]]] = {}
+
+            for obj in self._fetch_objects(doc_id, distance, query_text):
+                try:
+                    json_data = self._parse_json(obj.properties)
+                except Exception as e:
+                    print(f"Error extracting values: {e}")
+                    continue
+
+                if not group_by:
+                    values = groups.setdefault(None, [[] for _ in metrics])
+                    for idx, paths in enumerate(metric_paths):
+                        values[idx].extend(self._extract_values(json_data, paths))
+                    continue
+
+                for record in self._iter_records(json_data, record_paths):
+                    keys = [str(key) for key in self._extract_values(record, key_paths)] or [None]
+                    for key in dict.fromkeys(keys):
+                        values = groups.setdefault(key, [[] for _ in metrics])
+                        for idx, paths in enumerate(metric_paths):
+                            values[idx].extend(self._extract_values(record, paths))
+
+            rows = []
+            for key in sorted(groups, key=lambda k: (k is None, k or "")):
+                row = {"group": key} if group_by else {}
+                for column, (_, operation), values in zip(columns, metrics, groups[key]):
+                    row[column] = self._aggregate_values(values, operation, min_occurrences)
+                rows.append(row)
+
+            return {
+                "group_by": group_by,
+                "columns": (["group"] if group_by else []) + columns,
+                "rows": rows,
+            }
+        except Exception as e:
+            print(f"Aggregation error: {str(e)}")
+            raise
+
+    def _iter_records(self, json_data: Any, record_paths: List[str]) -> Iterator[Any]:
+        """Yield each record at record_paths, expanding arrays at every level"""
+        records = json_data if isinstance(json_data, list) else [json_data]
+        for path in record_paths:
+            expanded = []
+            for record in records:
+                for value in self._extract_values(record, [path]):
+                    if isinstance(value, list):
+                        expanded.extend(value)
+                    else:
+                        expanded.append(value)
+            records = expanded
+
+        yield from records
@@ -1,8 +1,22 @@
 import weaviate
 import json
+from datetime import datetime
 from app.core.embeddings_generator import EmbeddingGenerator
-from typing import List, Dict, Any
-from weaviate.classes.query import MetadataQuery
+from typing import List, Dict, Any, Iterator, Optional
+from weaviate.classes.query import MetadataQuery, Filter
+
+
+# Typed properties returned as the chunk's metadata
+METADATA_FIELDS = [
+    "filename",
+    "total_chunks",
+    "file_type",
+    "title",
+    "author",
+    "page_count",
+    "timestamp",
+    "extraction_method",
+]
 
 
 class RAGSystem:
@@ -14,7 +28,57 @@ class RAGSystem:
         self.store_client = store_client
         self.embedding_generator = embedding_generator
 
-    def query(self, query: str, top_k: int = 5) -> List[Dict[str, Any]]:
+    def _build_filters(
+            self,
+            doc_id: Optional[str] = None,
+            file_type: Optional[str] = None,
+            date_from: Optional[datetime] = None,
+            date_to: Optional[datetime] = None
+    ) -> Optional[Filter]:
+        """
+        Build a Weaviate filter from the query filters so they are applied server-side
+        """
+
+        conditions = []
+        if doc_id:
+            conditions.append(Filter.by_property("doc_id").equal(doc_id))
+        if file_type:
+            conditions.append(Filter.by_property("file_type").equal(file_type.lower()))
+        if date_from:
+            conditions.append(Filter.by_property("timestamp").greater_or_equal(date_from))
+        if date_to:
+            conditions.append(Filter.by_property("timestamp").less_or_equal(date_to))
+
+        if not conditions:
+            return None
+        if len(conditions) == 1:
+            return conditions[0]
+        return Filter.all_of(conditions)
+
+    def query(
+            self,
+            query: str,
+            top_k: int = 5,
+            doc_id: Optional[str] = None,
+            file_type: Optional[str] = None,
+            date_from: Optional[datetime] = None,
+            date_to: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        return list(self.query_stream(query, top_k, doc_id, file_type, date_from, date_to))
+
+    def query_stream(
+            self,
+            query: str,
+            top_k: int = 5,
+            doc_id: Optional[str] = None,
+            file_type: Optional[str] = None,
+            date_from: Optional[datetime] = None,
+            date_to: Optional[datetime] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Run the search and return an iterator that formats hits one at a time
+        """
+
         # Generate query embedding
         query_embedding = self.embedding_generator.generate(query)
 
@@ -26,29 +90,40 @@ class RAGSystem:
             .near_vector(
                 near_vector=query_embedding,
                 limit=top_k,
+                filters=self._build_filters(doc_id, file_type, date_from, date_to),
+                return_properties=["content", "doc_id", "chunk_id", "metadata", *METADATA_FIELDS],
                 return_metadata=MetadataQuery(distance=True)
             )
         )
 
+        return self._format_results(response.objects)
+
+    def _format_results(self, objects) -> Iterator[Dict[str, Any]]:
         # Process and format response
-        result = []
-        for obj in response.objects:
-            try:
-                metadata = json.loads(obj.properties["metadata"])
-            except (json.JSONDecodeError, KeyError):
-                metadata = {"error": "Failed to parse metadata"}
+        for obj in objects:
+            if obj.properties.get("filename") is not None:
+                metadata = {
+                    field: obj.properties.get(field)
+                    for field in METADATA_FIELDS
+                    if obj.properties.get(field) is not None
+                }
+            else:
+                # Objects ingested before the typed properties existed only
+                # carry the JSON metadata blob
+                try:
+                    metadata = json.loads(obj.properties["metadata"])
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    metadata = {"filename": "unknown", "error": "Failed to parse metadata"}
 
             # Get score
             distance = obj.metadata.distance
             similarity = 1-distance
 
-            result.append({
+            yield {
                 "content": obj.properties["content"],
                 "metadata": metadata,
                 "score": similarity,
                 "doc_id": obj.properties["doc_id"],
                 "chunk_id": obj.properties["chunk_id"],
                 "file_type": obj.properties["file_type"]
-            })
-            
-        return result
+            }
@@ -3,6 +3,7 @@ import weaviate
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.router import router
+from app.utils.dependencies import shutdown_pools
 
 
 app = FastAPI(
@@ -34,6 +35,12 @@ async def startup():
         print("Weaviate is ready.")
 
 
+@app.on_event("shutdown")
+async def shutdown():
+    # Stops the parse and embedding pools if a bulk upload started them
+    shutdown_pools()
+
+
 @app.get("/")
 def read_root():
     return {"message": "Welcome to the RAG System!"}
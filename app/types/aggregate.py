@@ -0,0 +1,19 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from app.core.json_aggregator import AggregationOperationType
+from app.types.query import StreamFormat
+
+
+class AggregationMetric(BaseModel):
+    field_path: str
+    operation: AggregationOperationType
+
+
+class AggregationRequest(BaseModel):
+    metrics: List[AggregationMetric] = Field(..., min_length=1)
+    group_by: Optional[str] = None
+    doc_id: Optional[str] = None
+    min_occurrences: int = 1
+    distance: Optional[float] = Field(None, ge=0.0, le=1.0)
+    query_text: Optional[str] = None
+    stream: Optional[StreamFormat] = None
@@ -1,15 +1,37 @@
 from pydantic import BaseModel
 from typing import Optional, List
+from datetime import datetime
+from enum import Enum
+
+class StreamFormat(str, Enum):
+    NDJSON = "ndjson"
+    SSE = "sse"
+
+
+class QueryFilters(BaseModel):
+    doc_id: Optional[str] = None
+    file_type: Optional[str] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+
 
 class QueryRequest(BaseModel):
     query: str
     limit: Optional[int] = 3
+    filters: Optional[QueryFilters] = None
+    stream: Optional[StreamFormat] = None
 
 
 # Response models
 class DocumentMetadata(BaseModel):
     filename: str
-    total_chunks: int
+    total_chunks: Optional[int] = None
+    file_type: Optional[str] = None
+    title: Optional[str] = None
+    author: Optional[str] = None
+    page_count: Optional[int] = None
+    timestamp: Optional[datetime] = None
+    extraction_method: Optional[str] = None
     # Allow additional fields
 
     class Config:
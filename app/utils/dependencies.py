@@ -1,8 +1,95 @@
+import os
+import multiprocessing
+import threading
 import weaviate
+from concurrent.futures import ProcessPoolExecutor
 from functools import lru_cache
-from app.core.embeddings_generator import EmbeddingGenerator
+from typing import Optional
+from app.core.embeddings_generator import EmbeddingGenerator, EmbeddingPool
 from weaviate.collections import Collection
-from weaviate.classes.config import Property, DataType, Configure, VectorDistances
+from weaviate.classes.config import Property, DataType, Configure, VectorDistances, Tokenization
+
+
+# Bulk ingestion runs a parse pool and an embedding pool side by side, so the
+# cores are split between them rather than each defaulting to every core.
+# Both sizes can be overridden through the environment.
+def _env_int(name: str, default: int) -> int:
+    """Read a positive integer setting from the environment"""
+    value = int(os.getenv(name, default))
+    if value < 1:
+        raise ValueError(f"{name} must be at least 1, got {value}")
+    return value
+
+
+CPU_COUNT = os.cpu_count() or 1
+PARSE_WORKERS = _env_int("RAG_PARSE_WORKERS", max(1, CPU_COUNT // 4))
+EMBEDDING_THREADS = _env_int("RAG_EMBEDDING_THREADS", 1)
+EMBEDDING_WORKERS = _env_int(
+    "RAG_EMBEDDING_WORKERS", max(1, (CPU_COUNT - PARSE_WORKERS) // EMBEDDING_THREADS))
+
+# Pools are created from threadpool request handlers; lru_cache alone would
+# let two concurrent first calls each start one
+_pool_lock = threading.Lock()
+
+
+# Metadata fields promoted out of the `metadata` JSON blob so they can be
+# filtered server-side and returned without client-side parsing
+METADATA_PROPERTIES = [
+    Property(
+        name="filename",
+        data_type=DataType.TEXT,
+        description="Original name of the uploaded file",
+        tokenization=Tokenization.FIELD,
+        index_filterable=True,
+    ),
+    Property(
+        name="title",
+        data_type=DataType.TEXT,
+        description="Document title",
+        index_filterable=True,
+    ),
+    Property(
+        name="author",
+        data_type=DataType.TEXT,
+        description="Document author",
+        index_filterable=True,
+    ),
+    Property(
+        name="page_count",
+        data_type=DataType.INT,
+        description="Number of pages in the source document",
+        index_filterable=True,
+        index_range_filters=True,
+    ),
+    Property(
+        name="total_chunks",
+        data_type=DataType.INT,
+        description="Number of chunks the document was split into",
+    ),
+    Property(
+        name="timestamp",
+        data_type=DataType.DATE,
+        description="Ingestion time of the document",
+        index_filterable=True,
+        index_range_filters=True,
+    ),
+    Property(
+        name="extraction_method",
+        data_type=DataType.TEXT,
+        description="Method used to extract the text (text_only, OCR, etc.)",
+        tokenization=Tokenization.FIELD,
+        index_filterable=True,
+    ),
+]
+
+
+def _add_missing_properties(collection: Collection):
+    """Add metadata properties missing from a collection created by an older schema"""
+    existing = {prop.name for prop in collection.config.get().properties}
+    for prop in METADATA_PROPERTIES:
+        if prop.name not in existing:
+            collection.config.add_property(prop)
+            print(f"Added property '{prop.name}' to Document collection")
 
 
 @lru_cache()
@@ -51,7 +138,8 @@ def weaviate_init() -> weaviate.Client:
                         name="file_type",
                         data_type=DataType.TEXT,
                         description="Type of the source file (pdf, docx, etc.)"
-                    )
+                    ),
+                    *METADATA_PROPERTIES
                 ],
                 vector_index_config=Configure.VectorIndex.hnsw(
                     distance_metric=VectorDistances.COSINE,
@@ -60,6 +148,7 @@ def weaviate_init() -> weaviate.Client:
             print("Created Document collection")
         else:
             print("Document collection already exists")
+            _add_missing_properties(client.collections.get("Document"))
 
     except Exception as e:
         print(f"Error creating schema: {str(e)}")
@@ -72,3 +161,50 @@ def weaviate_init() -> weaviate.Client:
 def embedding_generator_init() -> EmbeddingGenerator:
     """Initialize the embedding generator"""
     return EmbeddingGenerator()
+
+
+@lru_cache()
+def _embedding_pool() -> EmbeddingPool:
+    pool = EmbeddingPool(
+        processes=EMBEDDING_WORKERS,
+        threads_per_process=EMBEDDING_THREADS
+    )
+    pool.start()
+    return pool
+
+
+def embedding_pool_init() -> EmbeddingPool:
+    """Initialize the multi-process embedding pool used for bulk ingestion"""
+    with _pool_lock:
+        return _embedding_pool()
+
+
+_parse_pool: Optional[ProcessPoolExecutor] = None
+
+
+def parse_pool_init() -> ProcessPoolExecutor:
+    """Initialize the process pool that parses documents for bulk ingestion"""
+    global _parse_pool
+
+    with _pool_lock:
+        # A worker dying (e.g. OOM) breaks the executor for good, so replace it
+        if _parse_pool is None or getattr(_parse_pool, "_broken", False):
+            if _parse_pool is not None:
+                _parse_pool.shutdown(wait=False, cancel_futures=True)
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=PARSE_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _parse_pool
+
+
+def shutdown_pools():
+    """Stop the worker pools that have been started"""
+    global _parse_pool
+
+    with _pool_lock:
+        if _embedding_pool.cache_info().currsize:
+            _embedding_pool().stop()
+        if _parse_pool is not None:
+            _parse_pool.shutdown(wait=True, cancel_futures=True)
+            _parse_pool = None
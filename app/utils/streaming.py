@@ -0,0 +1,33 @@
+import json
+from typing import Any, Iterable, Iterator
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from app.types.query import StreamFormat
+
+
+def _encode_rows(rows: Iterable[Any], stream_format: StreamFormat) -> Iterator[str]:
+    try:
+        for row in rows:
+            data = json.dumps(jsonable_encoder(row))
+            if stream_format == StreamFormat.SSE:
+                yield f"data: {data}\n\n"
+            else:
+                yield f"{data}\n"
+    except Exception as e:
+        # Headers are already sent, so report the failure in-band
+        print(f"Streaming error: {str(e)}")
+        error = json.dumps({"error": str(e)})
+        if stream_format == StreamFormat.SSE:
+            yield f"event: error\ndata: {error}\n\n"
+        else:
+            yield f"{error}\n"
+        return
+
+    if stream_format == StreamFormat.SSE:
+        yield "event: end\ndata: {}\n\n"
+
+
+def stream_response(rows: Iterable[Any], stream_format: StreamFormat) -> StreamingResponse:
+    """Stream rows as newline-delimited JSON or server-sent events"""
+    media_type = "text/event-stream" if stream_format == StreamFormat.SSE else "application/x-ndjson"
+    return StreamingResponse(_encode_rows(rows, stream_format), media_type=media_type)